@@ -0,0 +1,176 @@
+import argparse
+import sys
+from pathlib import Path
+import numpy as np
+from Common import emit_json, get_wallpaper_dirs, run
+from ShowInfo import collect_directory_dimensions, collect_image_dimensions
+
+# Penalización por cada duplicación de escala al ampliar (se nota borroso)
+UPSCALE_WEIGHT = 1.0
+# Penalización por cada reducción a la mitad (se decodifican píxeles de más)
+DOWNSCALE_WEIGHT = 0.05
+# Por encima de estos límites la mejor opción se marca como mal ajustada
+MAX_UPSCALE = 1.25
+MAX_CROP_LOSS = 0.25
+
+
+def parse_screen(value):
+    """Convierte '1920x1080' en (1920, 1080)"""
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Resolución inválida: '{value}'")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"Resolución inválida: '{value}'")
+    return width, height
+
+
+def build_dimension_index(wallpaper_dirs, candidate_dirs=()):
+    """Índice precalculado de dimensiones para consultas vectorizadas.
+
+    Además de contents/images e images_dark se indexan los tamaños
+    prerenderizados de cada `candidate_dirs`, con la estructura
+    <dir>/<wallpaper>/<light|dark>/ (la que escribe Transcode.py).
+    """
+    wallpaper_dirs = list(wallpaper_dirs)
+    records = collect_image_dimensions(wallpaper_dirs)
+    for candidate_dir in map(Path, candidate_dirs):
+        for wallpaper_dir in wallpaper_dirs:
+            for label in ("light", "dark"):
+                records.extend(
+                    collect_directory_dimensions(
+                        wallpaper_dir.name,
+                        label,
+                        candidate_dir / wallpaper_dir.name / label,
+                        relative_to=candidate_dir.parent,
+                    )
+                )
+
+    keys = [(record[0], record[1]) for record in records]
+    groups = {key: group for group, key in enumerate(dict.fromkeys(keys))}
+    group = np.array([groups[key] for key in keys], dtype=np.int64)
+    return {
+        "records": records,
+        "group": group,
+        "group_size": np.bincount(group),
+        "width": np.array([record[2] for record in records], dtype=np.float64),
+        "height": np.array([record[3] for record in records], dtype=np.float64),
+    }
+
+
+def fit_warnings(scale, crop_loss):
+    warnings = []
+    if scale > MAX_UPSCALE:
+        warnings.append(f"ampliada x{scale:.2f}")
+    if crop_loss > MAX_CROP_LOSS:
+        warnings.append(f"recorta el {crop_loss:.0%}")
+    return warnings
+
+
+def score_images(index, screen):
+    """Escala y recorte al llenar la pantalla (modo 'escalado y recortado')"""
+    screen_w, screen_h = screen
+    scale = np.maximum(screen_w / index["width"], screen_h / index["height"])
+    crop_loss = 1 - (screen_w * screen_h) / (
+        index["width"] * index["height"] * scale**2
+    )
+    log_scale = np.log2(scale)
+    score = (
+        crop_loss
+        + UPSCALE_WEIGHT * np.maximum(log_scale, 0)
+        + DOWNSCALE_WEIGHT * np.maximum(-log_scale, 0)
+    )
+    return scale, crop_loss, score
+
+
+def select_best_indexes(index, screen):
+    """Índices en index["records"] de la mejor imagen de cada grupo"""
+    if not index["records"]:
+        return np.array([], dtype=np.int64), None, None
+    scale, crop_loss, score = score_images(index, screen)
+    # Ordenar por grupo y luego por puntuación: el primero de cada grupo gana
+    order = np.lexsort((score, index["group"]))
+    _, first = np.unique(index["group"][order], return_index=True)
+    return order[first], scale, crop_loss
+
+
+def select_best(index, screen):
+    """Mejor imagen light/dark de cada wallpaper para una pantalla.
+
+    `warnings` indica cuándo ni la mejor opción se ajusta bien a la pantalla.
+    """
+    best, scale, crop_loss = select_best_indexes(index, screen)
+    selection = {}
+    for idx in best:
+        folder, variant, width, height, _, name = index["records"][idx]
+        selection.setdefault(folder, {})[variant] = {
+            "file": name,
+            "width": width,
+            "height": height,
+            "candidates": int(index["group_size"][index["group"][idx]]),
+            "scale": round(float(scale[idx]), 4),
+            "crop_loss": round(float(crop_loss[idx]), 4),
+            "warnings": fit_warnings(float(scale[idx]), float(crop_loss[idx])),
+        }
+    return selection
+
+
+def select_best_for_screens(index, screens):
+    return {f"{w}x{h}": select_best(index, (w, h)) for w, h in screens}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Elegir la mejor imagen de cada wallpaper para una pantalla"
+    )
+    parser.add_argument(
+        "screens",
+        nargs="+",
+        type=parse_screen,
+        help="Resoluciones de pantalla, p. ej. 1920x1080 3840x2160 3440x1440",
+    )
+    parser.add_argument(
+        "-w", "--wallpaper", action="append", help="Limitar a estos wallpapers"
+    )
+    parser.add_argument(
+        "-c",
+        "--candidates",
+        action="append",
+        default=[],
+        help="Directorio con tamaños prerenderizados (<dir>/<wallpaper>/<light|dark>/)",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Emitir un objeto JSON por wallpaper"
+    )
+    args = parser.parse_args()
+
+    wallpapers_dir = Path(__file__).resolve().parent
+    try:
+        wallpaper_dirs = get_wallpaper_dirs(wallpapers_dir, args.wallpaper)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 2
+    candidate_dirs = [wallpapers_dir / candidate for candidate in args.candidates]
+    index = build_dimension_index(wallpaper_dirs, candidate_dirs)
+
+    for screen, selection in select_best_for_screens(index, args.screens).items():
+        if not args.json:
+            print(f"\n=== {screen} ===")
+        for folder, variants in selection.items():
+            if args.json:
+                record = {"screen": screen, "folder": folder, **variants}
+                emit_json(record)
+                continue
+            for variant, best in variants.items():
+                warnings = "".join(f" [!] {w}" for w in best["warnings"])
+                print(
+                    f"  {folder} ({variant}): {best['file']} "
+                    f"escala {best['scale']:.2f}, recorte {best['crop_loss']:.0%}"
+                    f"{warnings}"
+                )
+
+    return 0
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+
+def iter_wallpaper_dirs(wallpapers_dir, require_contents=True):
+    """Carpetas de wallpaper de la colección, en orden alfabético.
+
+    Se omiten las carpetas ocultas y las de Python (`.git`, `__pycache__`).
+    Con `require_contents` solo se devuelven las que tienen `contents/`.
+    """
+    for wallpaper_dir in sorted(Path(wallpapers_dir).iterdir()):
+        if not wallpaper_dir.is_dir() or wallpaper_dir.name.startswith((".", "__")):
+            continue
+        if require_contents and not (wallpaper_dir / "contents").exists():
+            continue
+        yield wallpaper_dir
+
+
+def get_wallpaper_dirs(wallpapers_dir, folders=None, require_contents=True):
+    """Carpetas pedidas por línea de comandos o, sin ninguna, toda la colección.
+
+    Lanza FileNotFoundError si alguna de las carpetas pedidas no existe.
+    """
+    if not folders:
+        return list(iter_wallpaper_dirs(wallpapers_dir, require_contents))
+    wallpaper_dirs = [Path(wallpapers_dir) / folder for folder in folders]
+    for wallpaper_dir in wallpaper_dirs:
+        if not wallpaper_dir.is_dir():
+            raise FileNotFoundError(f"La carpeta '{wallpaper_dir.name}' no existe.")
+    return wallpaper_dirs
+
+
+def emit_json(record):
+    """Escribe una línea NDJSON y la vacía para que el consumidor la vea ya"""
+    print(json.dumps(record, ensure_ascii=False), flush=True)
+
+
+def run(main):
+    """Ejecuta `main` y sale con su código de retorno"""
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # El consumidor cerró la tubería (p. ej. `| head`)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
@@ -2,10 +2,11 @@ import subprocess
 import time
 import pyautogui
 from pathlib import Path
-from PIL import Image, ImageDraw
 import argparse
 import shutil
 import json
+from ImageProcessing import composite_diagonal, open_image
+from Screenshots import record_screenshot
 
 
 def get_git_config():
@@ -129,18 +130,28 @@ def set_wallpaper_and_screenshot(wallpaper_dir, go_to_desktop=False):
 
         # Combinar capturas de pantalla
         combined_screenshot = contents_dir / screenshot_name
-        combine_screenshots(light_screenshot, dark_screenshot, combined_screenshot)
+        try:
+            combine_screenshots(light_screenshot, dark_screenshot, combined_screenshot)
+        except (MemoryError, OSError) as e:
+            # PixelBudgetError es un MemoryError
+            print(f"No se pudo combinar las capturas de '{wallpaper_dir.name}': {e}")
+            if go_to_desktop:
+                pyautogui.hotkey("winleft", "d")
+            return False
+        finally:
+            # Eliminar capturas individuales
+            light_screenshot.unlink(missing_ok=True)
+            dark_screenshot.unlink(missing_ok=True)
         print(f"Captura combinada guardada en {combined_screenshot}")
-
-        # Eliminar capturas individuales
-        light_screenshot.unlink()
-        dark_screenshot.unlink()
     else:
         # Renombrar la captura light a screenshot.png
         final_screenshot = contents_dir / screenshot_name
         light_screenshot.rename(final_screenshot)
         print(f"Captura guardada en {final_screenshot}")
 
+    # Registrar las imágenes con las que se generó el screenshot
+    record_screenshot(wallpaper_dir)
+
     if go_to_desktop:
         pyautogui.hotkey("winleft", "d")
 
@@ -148,24 +159,14 @@ def set_wallpaper_and_screenshot(wallpaper_dir, go_to_desktop=False):
 
 
 def combine_screenshots(light_image_path, dark_image_path, output_path):
-    # Abrir imágenes
-    light_image = Image.open(light_image_path)
-    dark_image = Image.open(dark_image_path)
-
-    # Asegurarse de que las imágenes tengan el mismo tamaño
-    width, height = light_image.size
-    dark_image = dark_image.resize((width, height))
-
-    # Crear nueva imagen con el mismo tamaño
-    combined_image = Image.new("RGB", (width, height))
-
-    # Crear una máscara para la transición diagonal
-    mask = Image.new("L", (width, height))
-    draw = ImageDraw.Draw(mask)
-    draw.polygon([(0, 0), (width, 0), (0, height)], fill=255)
-
-    # Combinar las imágenes usando la máscara
-    combined_image = Image.composite(light_image, dark_image, mask)
+    # Abrir imágenes en su modo original (spectacle guarda RGBA); light se
+    # reserva para dos fotogramas: light y dark
+    light_image = open_image(light_image_path, mode=None, frames=2)
+    dark_image = open_image(dark_image_path, mode=None)
+
+    # Combinar por franjas con la transición diagonal; dark se ajusta al
+    # tamaño de light sin crear la máscara ni una copia redimensionada completas
+    combined_image = composite_diagonal(light_image, dark_image)
 
     # Guardar imagen combinada
     combined_image.save(output_path)
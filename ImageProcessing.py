@@ -0,0 +1,136 @@
+import os
+from pathlib import Path
+from PIL import Image, ImageDraw
+
+# Pico estimado de memoria por proceso, en píxeles de 4 bytes (Pillow guarda RGB
+# y RGBA con 4 bytes por píxel). 80 MP son ~320 MB sin contar el intérprete:
+# alcanza para dos fotogramas 8K, pero no para codificar uno a WebP/AVIF
+# (Transcode.py usa su propio presupuesto, TRANSCODE_PIXEL_BUDGET).
+# El presupuesto se comprueba antes de decodificar (open_image, decode_frames)
+# y de codificar (encoder_frames); el resto de operaciones trabaja por franjas.
+DEFAULT_PIXEL_BUDGET = 80_000_000
+# Presupuesto por worker de Transcode.py: una imagen 8K más el codificador AVIF
+# (7680 x 4320 x 7 = 232 MP, ~930 MB). Con -j N el pico total es N veces esto.
+TRANSCODE_PIXEL_BUDGET = 240_000_000
+# Memoria de trabajo de cada codificador (y de decodificar después la variante),
+# en fotogramas del tamaño de la imagen. Medido con una imagen 8K: el pico real
+# queda a ~50 MB (el intérprete) de la estimación.
+ENCODER_FRAMES = {"WEBP": 4, "AVIF": 6}
+DEFAULT_ENCODER_FRAMES = 2
+# Alto de las franjas en las operaciones por franjas (múltiplo de 8 para SSIM/JPEG)
+STRIP_HEIGHT = 256
+
+_pixel_budget = int(os.environ.get("WALLPAPER_PIXEL_BUDGET", DEFAULT_PIXEL_BUDGET))
+
+
+class PixelBudgetError(MemoryError):
+    pass
+
+
+def get_pixel_budget():
+    return _pixel_budget
+
+
+def set_pixel_budget(pixels):
+    """Fija el presupuesto de píxeles del proceso (p. ej. en cada worker)"""
+    global _pixel_budget
+    _pixel_budget = int(pixels)
+
+
+def ensure_pixel_budget(pixels, description="la operación"):
+    if pixels > _pixel_budget:
+        raise PixelBudgetError(
+            f"{description} necesita {pixels / 1_000_000:.1f} MP, "
+            f"el presupuesto es {_pixel_budget / 1_000_000:.1f} MP"
+        )
+
+
+def encoder_frames(fmt):
+    """Fotogramas de memoria de trabajo que necesita el codificador de `fmt`"""
+    return ENCODER_FRAMES.get(fmt.upper(), DEFAULT_ENCODER_FRAMES)
+
+
+def decode_frames(img, frames=1, description=None):
+    """Valida el presupuesto y decodifica por completo una imagen ya abierta"""
+    ensure_pixel_budget(
+        img.width * img.height * frames,
+        description or f"Decodificar {getattr(img, 'filename', '') or 'imagen'}",
+    )
+    img.load()
+    return img
+
+
+def open_image(path, max_size=None, mode="RGB", frames=1):
+    """Abre una imagen decodificando solo la resolución necesaria.
+
+    Con `max_size`, JPEG decodifica directamente a 1/2, 1/4 u 1/8 mediante
+    draft() y el resto se reduce con reduce(); la imagen resultante sigue
+    siendo al menos tan grande como `max_size`. `frames` indica cuántas
+    copias de este tamaño mantendrá el llamador, para validar el presupuesto
+    antes de decodificar. Con `mode=None` se conserva el modo original y no
+    se cuenta ninguna conversión.
+    """
+    img = Image.open(path)
+    factor = 1
+    if max_size:
+        img.draft(mode or img.mode, max_size)
+        factor = max(1, min(img.width // max_size[0], img.height // max_size[1]))
+
+    kept = (img.width // factor) * (img.height // factor)
+    peak = kept * frames
+    if factor > 1:
+        # reduce() necesita primero el fotograma completo de draft()
+        peak += img.width * img.height
+    if mode and img.mode != mode:
+        peak += kept
+    try:
+        ensure_pixel_budget(peak, f"Decodificar {Path(path).name}")
+    except PixelBudgetError:
+        img.close()
+        raise
+
+    if factor > 1:
+        reduced = img.reduce(factor)
+        img.close()
+        img = reduced
+    else:
+        img.load()
+    if mode and img.mode != mode:
+        img = img.convert(mode)
+    return img
+
+
+def iter_strips(size, strip_height=STRIP_HEIGHT):
+    """Cajas (izq., sup., der., inf.) que recorren la imagen por franjas"""
+    width, height = size
+    for top in range(0, height, strip_height):
+        yield (0, top, width, min(top + strip_height, height))
+
+
+def composite_diagonal(light, dark, strip_height=STRIP_HEIGHT):
+    """Pega `dark` bajo la diagonal de `light`, por franjas y sobre `light`.
+
+    Equivale a Image.composite(light, dark, mask) con la máscara triangular de
+    los screenshots, sin crear la máscara completa ni `dark` redimensionada.
+    Si los modos difieren, `dark` se convierte al modo de `light` por franjas.
+    """
+    width, height = light.size
+    scale_y = dark.height / height
+    for left, top, right, bottom in iter_strips(light.size, strip_height):
+        if dark.size == light.size:
+            dark_strip = dark.crop((left, top, right, bottom))
+        else:
+            dark_strip = dark.resize(
+                (right - left, bottom - top),
+                box=(0, top * scale_y, dark.width, bottom * scale_y),
+            )
+        if dark_strip.mode != light.mode:
+            dark_strip = dark_strip.convert(light.mode)
+        # Misma máscara que combine_screenshots: el triángulo superior izquierdo
+        # (incluido el borde) conserva light; el resto recibe dark
+        mask = Image.new("L", dark_strip.size, 255)
+        ImageDraw.Draw(mask).polygon(
+            [(0, -top), (width, -top), (0, height - top)], fill=0
+        )
+        light.paste(dark_strip, (left, top), mask)
+    return light
@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+from PIL import ImageChops, ImageOps, ImageStat
+from Common import emit_json, get_wallpaper_dirs, run
+from ImageProcessing import composite_diagonal, open_image
+
+MANIFEST_NAME = "screenshots.json"
+SCREENSHOT_NAME = "screenshot.png"
+# Tamaño de comparación perceptual (16:9, suficiente para detectar otra imagen)
+COMPARE_SIZE = (64, 36)
+
+
+def get_manifest_path(wallpapers_dir):
+    return Path(wallpapers_dir) / MANIFEST_NAME
+
+
+def load_manifest(wallpapers_dir):
+    manifest_path = get_manifest_path(wallpapers_dir)
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(wallpapers_dir, manifest):
+    manifest_path = get_manifest_path(wallpapers_dir)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_source_images(wallpaper_dir):
+    """Imágenes light/dark de las que se construye el screenshot"""
+    contents_dir = Path(wallpaper_dir) / "contents"
+    sources = {}
+    for variant, directory in (
+        ("light", contents_dir / "images"),
+        ("dark", contents_dir / "images_dark"),
+    ):
+        if directory.exists():
+            files = sorted(f for f in directory.iterdir() if f.is_file())
+            if files:
+                sources[variant] = files[0]
+    return sources
+
+
+def build_entry(wallpaper_dir):
+    contents_dir = Path(wallpaper_dir) / "contents"
+    return {
+        "sources": {
+            variant: {
+                "file": str(path.relative_to(contents_dir)),
+                "sha256": file_hash(path),
+            }
+            for variant, path in get_source_images(wallpaper_dir).items()
+        },
+        "screenshot": file_hash(contents_dir / SCREENSHOT_NAME),
+    }
+
+
+def record_screenshot(wallpaper_dir, wallpapers_dir=None):
+    """Registra los hashes de las fuentes con las que se generó el screenshot"""
+    wallpaper_dir = Path(wallpaper_dir)
+    wallpapers_dir = Path(wallpapers_dir or wallpaper_dir.parent)
+    manifest = load_manifest(wallpapers_dir)
+    manifest[wallpaper_dir.name] = build_entry(wallpaper_dir)
+    save_manifest(wallpapers_dir, manifest)
+
+
+def load_thumbnail(path, size):
+    # Decodifica a escala reducida (draft/reduce) antes de recortar
+    with open_image(path, (size[0] * 2, size[1] * 2)) as img:
+        return ImageOps.fit(img, size)
+
+
+def perceptual_difference(wallpaper_dir):
+    """Diferencia media (0-1) entre el screenshot y el compuesto de las fuentes"""
+    wallpaper_dir = Path(wallpaper_dir)
+    sources = get_source_images(wallpaper_dir)
+    screenshot = load_thumbnail(
+        wallpaper_dir / "contents" / SCREENSHOT_NAME, COMPARE_SIZE
+    )
+    expected = load_thumbnail(sources["light"], COMPARE_SIZE)
+    if "dark" in sources:
+        # Misma transición diagonal que Generate.combine_screenshots
+        dark = load_thumbnail(sources["dark"], COMPARE_SIZE)
+        expected = composite_diagonal(expected, dark)
+
+    diff = ImageChops.difference(screenshot.convert("L"), expected.convert("L"))
+    return ImageStat.Stat(diff).mean[0] / 255
+
+
+def check_screenshot(wallpaper_dir, manifest, perceptual=False, threshold=0.08):
+    wallpaper_dir = Path(wallpaper_dir)
+    screenshot_file = wallpaper_dir / "contents" / SCREENSHOT_NAME
+    result = {"folder": wallpaper_dir.name, "status": "fresh", "reasons": []}
+
+    if "light" not in get_source_images(wallpaper_dir):
+        result["status"] = "no-sources"
+        return result
+    if not screenshot_file.exists():
+        result["status"] = "missing"
+        return result
+
+    entry = manifest.get(wallpaper_dir.name)
+    if entry is None:
+        result["status"] = "untracked"
+    else:
+        current = build_entry(wallpaper_dir)
+        for variant in sorted(set(entry["sources"]) | set(current["sources"])):
+            recorded = entry["sources"].get(variant, {}).get("sha256")
+            actual = current["sources"].get(variant, {}).get("sha256")
+            if recorded != actual:
+                result["reasons"].append(f"Imagen {variant} modificada")
+        if entry["screenshot"] != current["screenshot"]:
+            result["reasons"].append("screenshot.png modificado manualmente")
+        if result["reasons"]:
+            result["status"] = "stale"
+
+    if perceptual:
+        difference = perceptual_difference(wallpaper_dir)
+        result["difference"] = round(difference, 4)
+        if difference > threshold:
+            result["status"] = "stale"
+            result["reasons"].append(
+                f"Diferencia perceptual {difference:.3f} > {threshold}"
+            )
+
+    return result
+
+
+def regenerate_screenshots(wallpaper_dirs):
+    """Regenera en un solo lote; el escritorio se muestra una sola vez"""
+    import pyautogui
+    from Generate import set_wallpaper_and_screenshot
+
+    regenerated = []
+    pyautogui.hotkey("winleft", "d")
+    try:
+        for wallpaper_dir in wallpaper_dirs:
+            print(f"\nRegenerando screenshot de '{wallpaper_dir.name}'...")
+            try:
+                if set_wallpaper_and_screenshot(wallpaper_dir):
+                    regenerated.append(wallpaper_dir)
+            except (subprocess.CalledProcessError, OSError) as e:
+                # Un fallo de plasma-apply-wallpaperimage o spectacle no
+                # detiene el lote; se descartan las capturas a medio hacer
+                print(f"No se pudo regenerar '{wallpaper_dir.name}': {e}")
+                contents_dir = wallpaper_dir / "contents"
+                for capture in ("light_screenshot.png", "dark_screenshot.png"):
+                    (contents_dir / capture).unlink(missing_ok=True)
+    finally:
+        pyautogui.hotkey("winleft", "d")
+    return regenerated
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Detectar y regenerar screenshots desactualizados"
+    )
+    parser.add_argument(
+        "folders", nargs="*", help="Carpetas de wallpaper a revisar (todas por defecto)"
+    )
+    parser.add_argument(
+        "-p",
+        "--perceptual",
+        action="store_true",
+        help="Comparar además el screenshot con las imágenes actuales",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.08,
+        help="Diferencia perceptual máxima aceptada (0-1, por defecto 0.08)",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Registrar como vigentes los screenshots sin seguimiento",
+    )
+    parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="Regenerar en lote los screenshots desactualizados o faltantes",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Emitir un objeto JSON por wallpaper"
+    )
+    args = parser.parse_args()
+
+    wallpapers_dir = Path(__file__).resolve().parent
+    manifest = load_manifest(wallpapers_dir)
+
+    try:
+        wallpaper_dirs = get_wallpaper_dirs(wallpapers_dir, args.folders)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    outdated = []
+    for wallpaper_dir in wallpaper_dirs:
+        result = check_screenshot(
+            wallpaper_dir, manifest, args.perceptual, args.threshold
+        )
+        if result["status"] == "untracked" and args.record:
+            manifest[wallpaper_dir.name] = build_entry(wallpaper_dir)
+            result["status"] = "recorded"
+        if result["status"] in ("stale", "missing"):
+            outdated.append(wallpaper_dir)
+
+        if args.json:
+            emit_json(result)
+        elif result["status"] != "fresh":
+            print(f"{result['folder']}: {result['status']}")
+            for reason in result["reasons"]:
+                print(f"  - {reason}")
+
+    if args.record:
+        save_manifest(wallpapers_dir, manifest)
+
+    if args.regenerate and outdated:
+        regenerated = regenerate_screenshots(outdated)
+        print(f"\nScreenshots regenerados: {len(regenerated)} de {len(outdated)}")
+        return 0 if len(regenerated) == len(outdated) else 1
+
+    return 1 if outdated else 0
+
+
+if __name__ == "__main__":
+    run(main)
@@ -1,46 +1,93 @@
 from PIL import Image
 import json
+import numpy as np
 from pathlib import Path
 import subprocess
 import argparse
+from Common import emit_json, iter_wallpaper_dirs, run
+
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".avif"]
+
+
+# Extend this table to recognise more screens; portrait entries are height > width
+RESOLUTION_STANDARDS = {
+    (1280, 720): "HD (720p)",
+    (1920, 1080): "Full HD (1080p)",
+    (2560, 1440): "2K (1440p)",
+    (3840, 2160): "4K (2160p)",
+    (5120, 2880): "5K (2880p)",
+    (7680, 4320): "8K (4320p)",
+    (1920, 1200): "WUXGA (1920x1200)",
+    (2560, 1600): "WQXGA (2560x1600)",
+    (2560, 1080): "Ultrawide Full HD (2560x1080)",
+    (3440, 1440): "Ultrawide QHD (3440x1440)",
+    (5120, 2160): "Ultrawide 5K2K (5120x2160)",
+    (5120, 1440): "Super Ultrawide (5120x1440)",
+    (1080, 1920): "Portrait Full HD (1080x1920)",
+    (1440, 2560): "Portrait 2K (1440x2560)",
+    (2160, 3840): "Portrait 4K (2160x3840)",
+}
+
+# Maximum aspect ratio difference (as a log ratio, ~5%) to share a class
+ASPECT_TOLERANCE = 0.05
+# Maximum pixel count difference (as a log ratio, ~50%) to share a class
+PIXELS_TOLERANCE = 0.4
+
+COMMON_ASPECT_RATIOS = {
+    "16:9": 16 / 9,
+    "16:10": 16 / 10,
+    "3:2": 3 / 2,
+    "4:3": 4 / 3,
+    "5:4": 5 / 4,
+    "1:1": 1,
+    "21:9": 21 / 9,
+    "32:9": 32 / 9,
+    "9:16": 9 / 16,
+    "10:16": 10 / 16,
+}
+
+MEGAPIXEL_BINS = [0, 1, 2, 4, 8, 16, 33, float("inf")]
+FILE_SIZE_BINS_MB = [0, 0.5, 1, 2, 5, 10, 20, float("inf")]
+
+
+def classify_resolutions(widths, heights, resolutions=None):
+    """Classify many dimensions at once against the standards table.
+
+    Among the standards with a similar aspect ratio and pixel count, the one
+    with the closest pixel count wins. Returns an array of standard indexes (-1 when nothing
+    matches) and the list of standard names.
+    """
+    resolutions = RESOLUTION_STANDARDS if resolutions is None else resolutions
+    names = list(resolutions.values())
+    std = np.array(list(resolutions.keys()), dtype=np.float64).reshape(-1, 2)
+    widths = np.asarray(widths, dtype=np.float64).reshape(-1, 1)
+    heights = np.asarray(heights, dtype=np.float64).reshape(-1, 1)
+
+    ratio_diff = np.abs(np.log(widths / heights) - np.log(std[:, 0] / std[:, 1]))
+    pixels_diff = np.abs(np.log(widths * heights) - np.log(std[:, 0] * std[:, 1]))
+    similar = (ratio_diff <= ASPECT_TOLERANCE) & (pixels_diff <= PIXELS_TOLERANCE)
+    score = np.where(similar, pixels_diff, np.inf)
+
+    indexes = np.argmin(score, axis=1)
+    indexes[~np.isfinite(score[np.arange(len(indexes)), indexes])] = -1
+    return indexes, names
 
 
 def find_closest_resolution(width, height, resolutions):
-    aspect_ratio = width / height
-    min_diff = float("inf")
-    closest = "Strange resolution" + f" ({width}x{height})"
-
-    current_pixels = width * height
-
-    for (std_w, std_h), name in resolutions.items():
-        std_ratio = std_w / std_h
-        ratio_diff = abs(aspect_ratio - std_ratio)
-        pixels_diff = abs(current_pixels - (std_w * std_h)) / 1000000
-
-        # Si encuentra una resolución cercana, actualiza closest
-        if (ratio_diff < 0.2 or pixels_diff < 2) and pixels_diff < min_diff:
-            min_diff = pixels_diff
-            closest = name
-
-    return closest
+    indexes, names = classify_resolutions([width], [height], resolutions)
+    if indexes[0] < 0:
+        return "Strange resolution" + f" ({width}x{height})"
+    return names[indexes[0]]
 
 
 def get_resolution_standard(width, height):
-    resolutions = {
-        (1280, 720): "HD (720p)",
-        (1920, 1080): "Full HD (1080p)",
-        (2560, 1440): "2K (1440p)",
-        (3840, 2160): "4K (2160p)",
-        (7680, 4320): "8K (4320p)",
-    }
-
     # Coincidencia exacta
-    exact_match = resolutions.get((width, height))
+    exact_match = RESOLUTION_STANDARDS.get((width, height))
     if exact_match:
         return exact_match
 
     # Buscar aproximación
-    return find_closest_resolution(width, height, resolutions)
+    return find_closest_resolution(width, height, RESOLUTION_STANDARDS)
 
 
 def get_image_resolution(image_path):
@@ -91,7 +138,7 @@ def process_image_directory(directory, label=""):
 
     images = []
     for file_path in directory.glob("*"):
-        if file_path.suffix.lower() in [".png", ".jpg", ".jpeg", ".gif", ".bmp"]:
+        if file_path.suffix.lower() in IMAGE_EXTENSIONS:
             images.append((label, file_path))
 
     return images
@@ -274,14 +321,211 @@ def process_single_wallpaper(wallpaper_dir, show_authors=False):
     process_screenshot(content_dir)
 
 
+def collect_wallpaper_info(wallpaper_dir, show_authors=False):
+    """Collect metadata and image resolutions without displaying anything"""
+    wallpaper_path = Path(wallpaper_dir)
+    content_dir = wallpaper_path / "contents"
+    info = {"folder": wallpaper_path.name}
+    errors = []
+
+    metadata = get_filtered_metadata(wallpaper_path, show_authors)
+    if "error" in metadata:
+        errors.append(metadata.pop("error"))
+    authors = metadata.pop("_authors", None)
+    info["metadata"] = metadata
+    if authors is not None:
+        info["authors"] = authors
+
+    info["images"] = []
+    for label, directory in (
+        ("Light", content_dir / "images"),
+        ("Dark", content_dir / "images_dark"),
+    ):
+        if not directory.exists() or is_directory_empty(directory):
+            continue
+        for _, image_path in process_image_directory(directory, label):
+            resolution = get_image_resolution(image_path)
+            if isinstance(resolution, str):
+                errors.append(resolution)
+                continue
+            width, height, standard = resolution
+            info["images"].append(
+                {
+                    "variant": label.lower(),
+                    "file": image_path.name,
+                    "width": width,
+                    "height": height,
+                    "standard": standard,
+                }
+            )
+
+    if not info["images"]:
+        errors.append("No valid images found")
+    info["screenshot"] = (content_dir / "screenshot.png").is_file()
+    info["errors"] = errors
+
+    return info
+
+
+def collect_directory_dimensions(folder, label, directory, relative_to=None):
+    """Header-only (folder, label, width, height, size, name) records.
+
+    `name` is the file name, or the path relative to `relative_to` if given.
+    """
+    records = []
+    if not directory.exists():
+        return records
+    for image_path in sorted(directory.iterdir()):
+        if image_path.suffix.lower() not in IMAGE_EXTENSIONS:
+            continue
+        try:
+            with Image.open(image_path) as img:
+                width, height = img.size
+        except Exception:
+            continue
+        name = (
+            str(image_path.relative_to(relative_to)) if relative_to else image_path.name
+        )
+        records.append((folder, label, width, height, image_path.stat().st_size, name))
+    return records
+
+
+def collect_image_dimensions(wallpaper_dirs):
+    """Read image headers (no pixel data) for every light/dark variant"""
+    records = []
+    for wallpaper_dir in wallpaper_dirs:
+        content_dir = wallpaper_dir / "contents"
+        for label, directory in (
+            ("light", content_dir / "images"),
+            ("dark", content_dir / "images_dark"),
+        ):
+            records.extend(
+                collect_directory_dimensions(wallpaper_dir.name, label, directory)
+            )
+    return records
+
+
+def format_aspect_ratios(widths, heights):
+    """Snap each ratio to the nearest common one, or round it to two decimals"""
+    names = list(COMMON_ASPECT_RATIOS)
+    ratios = np.asarray(widths, dtype=np.float64) / np.asarray(heights)
+    common = np.log(np.array(list(COMMON_ASPECT_RATIOS.values())))
+    diff = np.abs(np.log(ratios).reshape(-1, 1) - common)
+    nearest = np.argmin(diff, axis=1)
+    return [
+        names[idx] if diff[row, idx] <= ASPECT_TOLERANCE else f"{ratio:.2f}:1"
+        for row, (idx, ratio) in enumerate(zip(nearest, ratios))
+    ]
+
+
+def format_bins(bins, unit):
+    return [
+        f">= {low:g} {unit}" if high == float("inf") else f"{low:g}-{high:g} {unit}"
+        for low, high in zip(bins[:-1], bins[1:])
+    ]
+
+
+def count_values(values):
+    labels, counts = np.unique(np.asarray(values, dtype=object), return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    return {str(labels[i]): int(counts[i]) for i in order}
+
+
+def get_collection_stats(wallpaper_dirs):
+    """Histograms by class, aspect ratio, megapixels and file size"""
+    records = collect_image_dimensions(wallpaper_dirs)
+    widths = np.array([r[2] for r in records], dtype=np.int64)
+    heights = np.array([r[3] for r in records], dtype=np.int64)
+    sizes = np.array([r[4] for r in records], dtype=np.int64)
+
+    indexes, names = classify_resolutions(widths, heights)
+    classes = np.array(names + ["Strange resolution"], dtype=object)[indexes]
+    megapixels = widths * heights / 1_000_000
+
+    mp_counts, _ = np.histogram(megapixels, bins=MEGAPIXEL_BINS)
+    size_counts, _ = np.histogram(sizes / 1_000_000, bins=FILE_SIZE_BINS_MB)
+
+    return {
+        "images": len(records),
+        "wallpapers": len({r[0] for r in records}),
+        "variants": count_values([r[1] for r in records]),
+        "total_size": int(sizes.sum()),
+        "classes": count_values(classes),
+        "aspect_ratios": count_values(format_aspect_ratios(widths, heights)),
+        "megapixels": dict(zip(format_bins(MEGAPIXEL_BINS, "MP"), map(int, mp_counts))),
+        "file_sizes": dict(
+            zip(format_bins(FILE_SIZE_BINS_MB, "MB"), map(int, size_counts))
+        ),
+    }
+
+
+def print_collection_stats(stats):
+    print(
+        f"{stats['images']} images in {stats['wallpapers']} wallpapers, "
+        f"{stats['total_size'] / 1_000_000:.1f} MB"
+    )
+    for title, key in (
+        ("Variants", "variants"),
+        ("Resolution classes", "classes"),
+        ("Aspect ratios", "aspect_ratios"),
+        ("Megapixels", "megapixels"),
+        ("File sizes", "file_sizes"),
+    ):
+        print(f"\n{title}:")
+        width = max(stats["images"], 1)
+        for label, count in stats[key].items():
+            bar = "#" * round(count * 40 / width)
+            print(f"  {label:<32} {count:>4} {bar}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Check wallpaper metadata and images")
     parser.add_argument("folder", nargs="?", help="Specific wallpaper folder to check")
     parser.add_argument(
         "-a", "--authors", action="store_true", help="Show authors information"
     )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Emit one JSON object per wallpaper (NDJSON) instead of displaying images",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Show collection statistics without displaying images",
+    )
     args = parser.parse_args()
 
+    if args.stats or args.json:
+        if args.folder:
+            folder = Path(args.folder)
+            if not (folder / "contents").is_dir():
+                error = f"No contents directory found in {folder}"
+                if args.json:
+                    emit_json({"folder": folder.name, "errors": [error]})
+                else:
+                    print(f"Error: {error}")
+                return 2
+            wallpaper_dirs = [folder]
+        else:
+            wallpaper_dirs = iter_wallpaper_dirs(get_wallpapers_directory())
+
+    if args.stats:
+        stats = get_collection_stats(wallpaper_dirs)
+        if args.json:
+            emit_json(stats)
+        else:
+            print_collection_stats(stats)
+        return 0
+
+    if args.json:
+        failed = False
+        for wallpaper_dir in wallpaper_dirs:
+            info = collect_wallpaper_info(wallpaper_dir, args.authors)
+            emit_json(info)
+            failed = failed or bool(info["errors"])
+        return 1 if failed else 0
+
     try:
         if args.folder:
             # Process single folder
@@ -292,7 +536,9 @@ def main():
             scan_folder_structure(parent_folder, args.authors)
     except Exception as e:
         print(f"Error: {e}")
+        return 2
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    run(main)
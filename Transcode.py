@@ -0,0 +1,417 @@
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+from PIL import Image, features
+from Common import emit_json, get_wallpaper_dirs, run
+from ImageProcessing import (
+    decode_frames,
+    encoder_frames,
+    ensure_pixel_budget,
+    PixelBudgetError,
+    TRANSCODE_PIXEL_BUDGET,
+    iter_strips,
+    open_image,
+    set_pixel_budget,
+)
+
+# Formato -> (extensión, plugin de Pillow requerido)
+FORMATS = {
+    "webp": (".webp", "webp"),
+    "avif": (".avif", "avif"),
+}
+SSIM_BLOCK = 8
+
+
+def get_original_images(wallpaper_dir):
+    contents_dir = Path(wallpaper_dir) / "contents"
+    originals = []
+    for variant, directory in (
+        ("light", contents_dir / "images"),
+        ("dark", contents_dir / "images_dark"),
+    ):
+        if directory.exists():
+            for image_path in sorted(directory.iterdir()):
+                if image_path.suffix.lower() in (".jpg", ".jpeg", ".png"):
+                    originals.append((variant, image_path))
+    return originals
+
+
+def decode_time(data, repeats=3):
+    """Mediana del tiempo de decodificación en memoria (sin E/S de disco)"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with Image.open(io.BytesIO(data)) as img:
+            decode_frames(img, description="Cronometrar la decodificación")
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def psnr(squared_error, count):
+    """PSNR en dB; las imágenes idénticas se reportan como 100 dB"""
+    if squared_error == 0:
+        return 100.0
+    return min(100.0, 10 * np.log10(255.0**2 * count / squared_error))
+
+
+def ssim_blocks(reference, candidate):
+    """Suma y número de valores SSIM de luminancia en bloques de 8x8"""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    h = reference.shape[0] // SSIM_BLOCK * SSIM_BLOCK
+    w = reference.shape[1] // SSIM_BLOCK * SSIM_BLOCK
+    shape = (h // SSIM_BLOCK, SSIM_BLOCK, w // SSIM_BLOCK, SSIM_BLOCK)
+    x = reference[:h, :w].reshape(shape)
+    y = candidate[:h, :w].reshape(shape)
+
+    mu_x = x.mean(axis=(1, 3), keepdims=True)
+    mu_y = y.mean(axis=(1, 3), keepdims=True)
+    var_x = ((x - mu_x) ** 2).mean(axis=(1, 3))
+    var_y = ((y - mu_y) ** 2).mean(axis=(1, 3))
+    cov = ((x - mu_x) * (y - mu_y)).mean(axis=(1, 3))
+    mu_x, mu_y = mu_x[:, 0, :, 0], mu_y[:, 0, :, 0]
+
+    ssim_map = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / (
+        (mu_x**2 + mu_y**2 + c1) * (var_x + var_y + c2)
+    )
+    return float(ssim_map.sum()), ssim_map.size
+
+
+def compare_images(source, decoded):
+    """PSNR (RGB) y SSIM (luminancia) calculados por franjas.
+
+    Solo se convierten a arreglos de numpy franjas de STRIP_HEIGHT filas, en
+    lugar de varias copias en coma flotante de la imagen completa.
+    """
+    squared_error, ssim_sum, ssim_count = 0.0, 0.0, 0
+    for box in iter_strips(source.size):
+        reference = source.crop(box)
+        candidate = decoded.crop(box)
+        difference = np.asarray(reference, dtype=np.float32) - np.asarray(
+            candidate, dtype=np.float32
+        )
+        squared_error += float(np.square(difference).sum())
+        strip_sum, strip_count = ssim_blocks(
+            np.asarray(reference.convert("L"), dtype=np.float32),
+            np.asarray(candidate.convert("L"), dtype=np.float32),
+        )
+        ssim_sum += strip_sum
+        ssim_count += strip_count
+
+    count = source.width * source.height * len(source.getbands())
+    return psnr(squared_error, count), ssim_sum / max(ssim_count, 1)
+
+
+def transcode_image(image_path, fmt, quality, output_dir):
+    """Codifica una imagen en `fmt` y mide tamaño y calidad.
+
+    El tiempo de decodificación se mide después, en serie (ver add_decode_times).
+    """
+    image_path = Path(image_path)
+    extension, _ = FORMATS[fmt]
+    output_path = Path(output_dir) / f"{image_path.stem}{extension}"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Pico: el original más la memoria del codificador, o bien el original y
+    # la variante decodificada para las métricas
+    with Image.open(image_path) as img:
+        pixels = img.width * img.height
+    ensure_pixel_budget(
+        pixels * max(1 + encoder_frames(fmt), 2),
+        f"Codificar {image_path.name} a {fmt}",
+    )
+    with open_image(image_path, frames=2) as source:
+        source.save(output_path, format=fmt.upper(), quality=quality)
+        with open_image(output_path) as decoded:
+            psnr_value, ssim_value = compare_images(source, decoded)
+
+    source_data = image_path.read_bytes()
+    data = output_path.read_bytes()
+    return {
+        "format": fmt,
+        "quality": quality,
+        "output": str(output_path),
+        "size": len(data),
+        "source_size": len(source_data),
+        "ratio": round(len(data) / len(source_data), 4),
+        "psnr": round(float(psnr_value), 2),
+        "ssim": round(ssim_value, 4),
+    }
+
+
+def run_task(wallpaper_name, variant, image_path, fmt, quality, output_dir):
+    result = {
+        "folder": wallpaper_name,
+        "variant": variant,
+        "file": image_path.name,
+        "source": str(image_path),
+    }
+    try:
+        result.update(
+            transcode_image(
+                image_path, fmt, quality, Path(output_dir) / wallpaper_name / variant
+            )
+        )
+    except Exception as e:
+        result.update({"format": fmt, "error": str(e)})
+    return result
+
+
+def add_decode_times(results, source_times):
+    """Mide la decodificación de cada variante; los originales se miden una vez.
+
+    Se ejecuta fuera del pool para que otros workers no compitan por la CPU.
+    """
+    for result in results:
+        if "error" in result:
+            yield result
+            continue
+        source = result["source"]
+        try:
+            if source not in source_times:
+                source_times[source] = decode_time(Path(source).read_bytes())
+            result["decode_time"] = round(
+                decode_time(Path(result["output"]).read_bytes()), 4
+            )
+        except PixelBudgetError as e:
+            result["error"] = str(e)
+            yield result
+            continue
+        result["source_decode_time"] = round(source_times[source], 4)
+        yield result
+
+
+def meets_thresholds(result, min_ssim, max_ratio, max_decode_ratio):
+    return (
+        "error" not in result
+        and result["ssim"] >= min_ssim
+        and result["ratio"] <= max_ratio
+        and result["decode_time"] <= result["source_decode_time"] * max_decode_ratio
+    )
+
+
+def pick_winner(results, min_ssim, max_ratio, max_decode_ratio):
+    """Variante más pequeña que cumple los umbrales, o None"""
+    candidates = [
+        r for r in results if meets_thresholds(r, min_ssim, max_ratio, max_decode_ratio)
+    ]
+    return min(candidates, key=lambda r: r["size"], default=None)
+
+
+def install_variant(wallpaper_dir, result):
+    """Reemplaza la imagen original por la variante ganadora"""
+    from Screenshots import check_screenshot, load_manifest, record_screenshot
+
+    wallpaper_dir = Path(wallpaper_dir)
+    directory = "images" if result["variant"] == "light" else "images_dark"
+    images_dir = wallpaper_dir / "contents" / directory
+    original = images_dir / result["file"]
+    variant_path = Path(result["output"])
+
+    # El screenshot no cambia visualmente; solo se vuelve a registrar si estaba vigente
+    manifest = load_manifest(wallpaper_dir.parent)
+    was_fresh = check_screenshot(wallpaper_dir, manifest)["status"] == "fresh"
+
+    target = images_dir / variant_path.name
+    target.write_bytes(variant_path.read_bytes())
+    if target != original:
+        original.unlink()
+
+    if was_fresh:
+        record_screenshot(wallpaper_dir)
+    return target
+
+
+def summarize(results):
+    summary = {}
+    for result in results:
+        if "error" in result:
+            continue
+        stats = summary.setdefault(
+            result["format"],
+            {"count": 0, "size": 0, "source_size": 0, "ssim": [], "decode": []},
+        )
+        stats["count"] += 1
+        stats["size"] += result["size"]
+        stats["source_size"] += result["source_size"]
+        stats["ssim"].append(result["ssim"])
+        stats["decode"].append(result["decode_time"] / result["source_decode_time"])
+    return {
+        fmt: {
+            "count": stats["count"],
+            "size": stats["size"],
+            "source_size": stats["source_size"],
+            "ratio": round(stats["size"] / stats["source_size"], 4),
+            "min_ssim": min(stats["ssim"]),
+            "mean_ssim": round(statistics.mean(stats["ssim"]), 4),
+            "decode_speedup": round(1 / statistics.median(stats["decode"]), 2),
+        }
+        for fmt, stats in summary.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Transcodificar wallpapers a WebP/AVIF y comparar tamaño y calidad"
+    )
+    parser.add_argument(
+        "folders",
+        nargs="*",
+        help="Carpetas de wallpaper a procesar (todas por defecto)",
+    )
+    parser.add_argument(
+        "-f",
+        "--formats",
+        default="webp,avif",
+        help="Formatos separados por comas (por defecto webp,avif)",
+    )
+    parser.add_argument(
+        "-q", "--quality", type=int, default=85, help="Calidad de codificación (0-100)"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Número de procesos en paralelo",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=".transcoded",
+        help="Directorio donde se escriben las variantes",
+    )
+    parser.add_argument(
+        "--install",
+        action="store_true",
+        help="Instalar la mejor variante en contents/ si cumple los umbrales",
+    )
+    parser.add_argument(
+        "--min-ssim", type=float, default=0.95, help="SSIM mínimo para instalar"
+    )
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=0.8,
+        help="Tamaño máximo relativo al original para instalar",
+    )
+    parser.add_argument(
+        "--max-decode-ratio",
+        type=float,
+        default=1.0,
+        help="Tiempo de decodificación máximo relativo al original para instalar",
+    )
+    parser.add_argument(
+        "--pixel-budget",
+        type=int,
+        default=TRANSCODE_PIXEL_BUDGET,
+        help="Pico estimado de memoria por worker, en píxeles de 4 bytes "
+        f"(por defecto {TRANSCODE_PIXEL_BUDGET:,}, una imagen 8K en AVIF)",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Emitir un objeto JSON por variante"
+    )
+    args = parser.parse_args()
+    # La fase en serie (tiempos de decodificación) respeta el mismo presupuesto
+    set_pixel_budget(args.pixel_budget)
+
+    formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+    for fmt in formats:
+        if fmt not in FORMATS:
+            parser.error(f"Formato no soportado: {fmt}")
+        if not features.check(FORMATS[fmt][1]):
+            parser.error(f"Pillow no tiene soporte para {fmt}")
+
+    wallpapers_dir = Path(__file__).resolve().parent
+    output_dir = wallpapers_dir / args.output
+    try:
+        wallpaper_dirs = get_wallpaper_dirs(wallpapers_dir, args.folders)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    # Fase paralela: codificación y métricas de calidad
+    with ProcessPoolExecutor(
+        max_workers=args.jobs,
+        initializer=set_pixel_budget,
+        initargs=(args.pixel_budget,),
+    ) as executor:
+        futures = [
+            executor.submit(
+                run_task,
+                wallpaper_dir.name,
+                variant,
+                image_path,
+                fmt,
+                args.quality,
+                output_dir,
+            )
+            for wallpaper_dir in wallpaper_dirs
+            for variant, image_path in get_original_images(wallpaper_dir)
+            for fmt in formats
+        ]
+        encoded = [future.result() for future in as_completed(futures)]
+
+    # Fase en serie: tiempos de decodificación sin competencia por la CPU
+    encoded.sort(key=lambda r: (r["folder"], r["variant"], r["file"], r["format"]))
+    results = []
+    for result in add_decode_times(encoded, {}):
+        results.append(result)
+        if args.json:
+            emit_json(result)
+        elif "error" in result:
+            print(
+                f"{result['folder']}/{result['file']} ({result['format']}): {result['error']}"
+            )
+        else:
+            print(
+                f"{result['folder']}/{result['file']} -> {result['format']}: "
+                f"{result['ratio']:.0%} del tamaño, SSIM {result['ssim']}, "
+                f"PSNR {result['psnr']} dB, decodificación "
+                f"{result['decode_time'] * 1000:.0f} ms "
+                f"(original {result['source_decode_time'] * 1000:.0f} ms)"
+            )
+
+    summary = summarize(results)
+    if args.json:
+        emit_json({"summary": summary})
+    else:
+        print("\nResumen por formato:")
+        for fmt, stats in summary.items():
+            print(
+                f"  {fmt}: {stats['count']} imágenes, {stats['ratio']:.0%} del tamaño, "
+                f"SSIM medio {stats['mean_ssim']} (mín. {stats['min_ssim']}), "
+                f"decodificación x{stats['decode_speedup']}"
+            )
+
+    if args.install:
+        grouped = {}
+        for result in results:
+            grouped.setdefault(
+                (result["folder"], result["variant"], result["file"]), []
+            ).append(result)
+        for (folder, variant, _), candidates in sorted(grouped.items()):
+            winner = pick_winner(
+                candidates, args.min_ssim, args.max_ratio, args.max_decode_ratio
+            )
+            if winner:
+                target = install_variant(wallpapers_dir / folder, winner)
+                print(
+                    f"Instalado {target.relative_to(wallpapers_dir)}", file=sys.stderr
+                )
+            else:
+                print(
+                    f"{folder} ({variant}): ninguna variante cumple los umbrales",
+                    file=sys.stderr,
+                )
+
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    run(main)
@@ -2,6 +2,7 @@ import json
 import re
 from pathlib import Path
 import argparse
+from Common import emit_json, iter_wallpaper_dirs, run
 
 
 def snake_case(name):
@@ -72,7 +73,15 @@ def fix_images_directory(images_dir, wallpaper_name):
         print(f"No se encontraron imágenes en contents/images de '{wallpaper_name}'.")
 
 
-def validate_wallpaper(wallpaper_dir):
+def ask_fix(message, question, interactive=True):
+    # En modo no interactivo no se pregunta nada y se reporta el problema
+    if not interactive:
+        return False
+    print(message)
+    return input(question).lower() == "s"
+
+
+def validate_wallpaper(wallpaper_dir, interactive=True):
     report = {"folder": wallpaper_dir.name, "errors": [], "warnings": []}
     metadata_file = wallpaper_dir / "metadata.json"
     contents_dir = wallpaper_dir / "contents"
@@ -81,13 +90,11 @@ def validate_wallpaper(wallpaper_dir):
     # Add screenshot validation
     screenshot_file = contents_dir / "screenshot.png"
     if not screenshot_file.exists():
-        print(
-            f"\nNo se encontró screenshot.png en contents/ de '{wallpaper_dir.name}'."
-        )
-        choice = input(
-            f"¿Desea generar el screenshot para '{wallpaper_dir.name}'? (s/n): "
-        )
-        if choice.lower() == "s":
+        if ask_fix(
+            f"\nNo se encontró screenshot.png en contents/ de '{wallpaper_dir.name}'.",
+            f"¿Desea generar el screenshot para '{wallpaper_dir.name}'? (s/n): ",
+            interactive,
+        ):
             from Generate import set_wallpaper_and_screenshot
 
             if set_wallpaper_and_screenshot(wallpaper_dir, True):
@@ -101,11 +108,11 @@ def validate_wallpaper(wallpaper_dir):
 
     # Validate metadata.json exists
     if not metadata_file.exists():
-        print(f"\nNo se encontró metadata.json en '{wallpaper_dir.name}'.")
-        choice = input(
-            f"¿Desea crear un metadata.json predeterminado para '{wallpaper_dir.name}'? (s/n): "
-        )
-        if choice.lower() == "s":
+        if ask_fix(
+            f"\nNo se encontró metadata.json en '{wallpaper_dir.name}'.",
+            f"¿Desea crear un metadata.json predeterminado para '{wallpaper_dir.name}'? (s/n): ",
+            interactive,
+        ):
             fix_metadata_json(wallpaper_dir, expected_id)
         else:
             report["errors"].append("metadata.json no encontrado")
@@ -128,11 +135,11 @@ def validate_wallpaper(wallpaper_dir):
     required_fields = ["License", "Name", "Name[es]", "Description", "Description[es]"]
     missing_fields = [field for field in required_fields if field not in kplugin]
     if missing_fields:
-        print(
-            f"\nEn '{wallpaper_dir.name}' faltan los siguientes campos en metadata.json: {', '.join(missing_fields)}."
-        )
-        choice = input(f"¿Desea agregarlos en '{wallpaper_dir.name}'? (s/n): ")
-        if choice.lower() == "s":
+        if ask_fix(
+            f"\nEn '{wallpaper_dir.name}' faltan los siguientes campos en metadata.json: {', '.join(missing_fields)}.",
+            f"¿Desea agregarlos en '{wallpaper_dir.name}'? (s/n): ",
+            interactive,
+        ):
             for field in missing_fields:
                 value = input(f"Ingrese el valor para {field}: ")
                 kplugin[field] = value
@@ -147,9 +154,11 @@ def validate_wallpaper(wallpaper_dir):
     # Check for at least one author
     authors = kplugin.get("Authors", [])
     if not authors:
-        print(f"\nNo se encontraron autores en '{wallpaper_dir.name}'.")
-        choice = input(f"¿Desea agregar un autor en '{wallpaper_dir.name}'? (s/n): ")
-        if choice.lower() == "s":
+        if ask_fix(
+            f"\nNo se encontraron autores en '{wallpaper_dir.name}'.",
+            f"¿Desea agregar un autor en '{wallpaper_dir.name}'? (s/n): ",
+            interactive,
+        ):
             fix_authors(kplugin, metadata_file, wallpaper_dir)
         else:
             report["errors"].append("Se requiere al menos un autor en metadata")
@@ -160,13 +169,11 @@ def validate_wallpaper(wallpaper_dir):
                 field for field in required_author_fields if field not in author
             ]
             if missing_author_fields:
-                print(
-                    f"\nEn '{wallpaper_dir.name}', el autor {idx+1} carece de los siguientes campos: {', '.join(missing_author_fields)}."
-                )
-                choice = input(
-                    f"¿Desea agregarlos para el autor {idx+1} en '{wallpaper_dir.name}'? (s/n): "
-                )
-                if choice.lower() == "s":
+                if ask_fix(
+                    f"\nEn '{wallpaper_dir.name}', el autor {idx+1} carece de los siguientes campos: {', '.join(missing_author_fields)}.",
+                    f"¿Desea agregarlos para el autor {idx+1} en '{wallpaper_dir.name}'? (s/n): ",
+                    interactive,
+                ):
                     fix_authors(kplugin, metadata_file, wallpaper_dir, idx)
                 else:
                     report["errors"].append(
@@ -176,11 +183,11 @@ def validate_wallpaper(wallpaper_dir):
     # Validate Id format
     actual_id = kplugin.get("Id", "")
     if actual_id != expected_id:
-        print(
-            f"\nId incorrecto en '{wallpaper_dir.name}'. Se esperaba '{expected_id}', se encontró '{actual_id}'."
-        )
-        choice = input(f"¿Desea corregir el Id en '{wallpaper_dir.name}'? (s/n): ")
-        if choice.lower() == "s":
+        if ask_fix(
+            f"\nId incorrecto en '{wallpaper_dir.name}'. Se esperaba '{expected_id}', se encontró '{actual_id}'.",
+            f"¿Desea corregir el Id en '{wallpaper_dir.name}'? (s/n): ",
+            interactive,
+        ):
             fix_id(kplugin, expected_id, metadata_file, wallpaper_dir)
         else:
             report["errors"].append(
@@ -195,13 +202,11 @@ def validate_wallpaper(wallpaper_dir):
     if images_dir.exists():
         images = [f for f in images_dir.iterdir() if f.is_file()]
         if len(images) != 1:
-            print(
-                f"\nDebe haber exactamente una imagen en contents/images de '{wallpaper_dir.name}'."
-            )
-            choice = input(
-                f"¿Desea corregir el directorio de imágenes en '{wallpaper_dir.name}'? (s/n): "
-            )
-            if choice.lower() == "s":
+            if ask_fix(
+                f"\nDebe haber exactamente una imagen en contents/images de '{wallpaper_dir.name}'.",
+                f"¿Desea corregir el directorio de imágenes en '{wallpaper_dir.name}'? (s/n): ",
+                interactive,
+            ):
                 fix_images_directory(images_dir, wallpaper_dir.name)
             else:
                 report["errors"].append(
@@ -221,48 +226,81 @@ def validate_wallpaper(wallpaper_dir):
     return report
 
 
+def print_report(report):
+    print(f"\nCarpeta: {report['folder']}")
+    if report["errors"]:
+        print("Errores:")
+        for error in report["errors"]:
+            print(f"  - {error}")
+    else:
+        print("Todas las validaciones pasaron")
+    if report["warnings"]:
+        print("Advertencias:")
+        for warning in report["warnings"]:
+            print(f"  - {warning}")
+
+
 def main():
     # Add argument parsing
     parser = argparse.ArgumentParser(description="Validar wallpapers")
     parser.add_argument(
         "folder", nargs="?", help="Carpeta específica de wallpaper a validar"
     )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Emitir un objeto JSON por wallpaper (NDJSON) sin preguntas interactivas",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Detenerse en el primer wallpaper con errores",
+    )
     args = parser.parse_args()
 
     wallpapers_dir = Path(__file__).resolve().parent
-    reports = []
 
     if args.folder:
         # Validate only the specified folder
         wallpaper_dir = wallpapers_dir / args.folder
-        if wallpaper_dir.is_dir():
-            report = validate_wallpaper(wallpaper_dir)
-            reports.append(report)
-        else:
-            print(f"La carpeta '{args.folder}' no existe.")
-            return
+        if not wallpaper_dir.is_dir():
+            if args.json:
+                emit_json(
+                    {
+                        "folder": args.folder,
+                        "errors": ["La carpeta no existe"],
+                        "warnings": [],
+                    }
+                )
+            else:
+                print(f"La carpeta '{args.folder}' no existe.")
+            return 2
+        wallpaper_dirs = [wallpaper_dir]
     else:
         # Validate all folders
-        for wallpaper_dir in wallpapers_dir.iterdir():
-            if wallpaper_dir.is_dir() and wallpaper_dir.name != ".git":
-                report = validate_wallpaper(wallpaper_dir)
-                reports.append(report)
-
-    # Generate the general report
-    print("\nReporte de Validación:")
-    for report in reports:
-        print(f"\nCarpeta: {report['folder']}")
-        if report["errors"]:
-            print("Errores:")
-            for error in report["errors"]:
-                print(f"  - {error}")
+        wallpaper_dirs = iter_wallpaper_dirs(wallpapers_dir, require_contents=False)
+
+    reports = []
+    failed = False
+    for wallpaper_dir in wallpaper_dirs:
+        report = validate_wallpaper(wallpaper_dir, interactive=not args.json)
+        if args.json:
+            emit_json(report)
         else:
-            print("Todas las validaciones pasaron")
-        if report["warnings"]:
-            print("Advertencias:")
-            for warning in report["warnings"]:
-                print(f"  - {warning}")
+            reports.append(report)
+        if report["errors"]:
+            failed = True
+            if args.fail_fast:
+                break
+
+    if not args.json:
+        # Generate the general report
+        print("\nReporte de Validación:")
+        for report in reports:
+            print_report(report)
+
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    run(main)